@@ -0,0 +1,135 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+class Overloaded(Exception):
+    """수용 한도 초과 → 429 + Retry-After 로 응답"""
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class AdmissionController:
+    """
+    동시 실행 수 제한 + 제한된 대기열 + 대기 타임아웃
+    - max_concurrency: 동시에 실행할 수 있는 작업 수
+    - max_queue: 실행 대기 가능한 최대 작업 수 (초과 시 즉시 거절)
+    - queue_timeout: 대기열에서 기다릴 수 있는 최대 시간(초)
+    """
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_avg = 0.0  # 실행 시간 EWMA (Retry-After 추정용)
+
+    def _retry_after(self) -> float:
+        # 대기열이 한 바퀴 빠지는 데 걸릴 예상 시간
+        per_slot = self.service_avg or 1.0
+        return per_slot * (self.waiting + 1) / self.max_concurrency
+
+    @asynccontextmanager
+    async def slot(self):
+        started = time.monotonic()
+        if not self._sem.locked():
+            await self._sem.acquire()  # 빈 슬롯이 있으면 즉시 획득 (대기 없음)
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(f"{self.name}: queue full", self._retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise Overloaded(f"{self.name}: queue wait timed out", self._retry_after())
+            finally:
+                self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.in_flight += 1
+        run_started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+            elapsed = time.monotonic() - run_started
+            self.service_avg = elapsed if not self.service_avg else 0.8 * self.service_avg + 0.2 * elapsed
+
+    def metrics(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_avg_s": round(self.wait_total / self.admitted, 4) if self.admitted else 0.0,
+            "wait_max_s": round(self.wait_max, 4),
+            "service_avg_s": round(self.service_avg, 4),
+        }
+
+class TokenBucketLimiter:
+    """
+    클라이언트별 토큰 버킷
+    - rate: 초당 충전 토큰 수 (0 이하면 제한 없음)
+    - burst: 버킷 최대 크기
+    """
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: dict[str, tuple[float, float]] = {}  # client -> (tokens, updated)
+        self.limited = 0
+
+    def acquire(self, client: str) -> None:
+        """토큰 1개 소비, 부족하면 Overloaded"""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            raise Overloaded("rate limit exceeded", (1 - tokens) / self.rate)
+        if client not in self._buckets and len(self._buckets) >= self.max_clients:
+            self._evict(now)
+        self._buckets[client] = (tokens - 1, now)
+
+    def _evict(self, now: float) -> None:
+        # 가득 찬(= 오래 쉬고 있는) 버킷은 버려도 동작이 같음
+        full_after = self.burst / self.rate
+        for c, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[c]
+        # 그래도 한도 이상이면 가장 오래 갱신되지 않은 버킷부터 제거 (키 회전으로 무한 증가 방지)
+        overflow = len(self._buckets) - self.max_clients + 1
+        if overflow > 0:
+            oldest = sorted(self._buckets.items(), key=lambda kv: kv[1][1])[:overflow]
+            for c, _ in oldest:
+                del self._buckets[c]
+
+    def metrics(self) -> dict:
+        return {
+            "rate_per_s": self.rate,
+            "enabled": self.rate > 0,
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "limited": self.limited,
+        }
@@ -1,14 +1,15 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-import os, datetime as dt
+import os, datetime as dt, json, csv, io
 from pathlib import Path
-from storage import save_report, list_reports
-from services import build_inputs, build_analysis_prompt, call_llm, fred_historical
+from storage import save_report, list_reports, iter_reports, save_profile, list_profiles, delete_profile
+from services import build_inputs, build_analysis_prompt, call_llm, fred_historical, run_profile_analyses, LLM_ADMISSION
+from services import shape_trend, TREND_FREQS, TREND_AGGS
+from admission import AdmissionController, TokenBucketLimiter, Overloaded
 from notion_client import Client as NotionClient
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from pdf_render import render_report_pdf
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -160,7 +161,7 @@ def format_data_report(data: dict, kind: str) -> str:
         "",
         "## ℹ️ 데이터 소스",
         "",
-        "- **경제 지표**: FRED API (실제 데이터만 사용)",
+        "- **경제 지표**: FRED API, 한국은행 ECOS (실제 데이터만 사용)",
         "- **뉴스**: RSS 피드 (연합뉴스, 한국경제, Google News)",
         "- **⚠️ 스텁 데이터 제거됨**: 실제 데이터만 표시",
         "",
@@ -183,20 +184,147 @@ app.add_middleware(
 EXPORT_DIR = Path(__file__).parent / "exports"
 EXPORT_DIR.mkdir(exist_ok=True)
 
+# 🆕 리포트 생성 수용 제어 (동시 실행/대기열/클라이언트별 요청률)
+REPORT_ADMISSION = AdmissionController(
+    "report",
+    int(os.getenv("REPORT_MAX_CONCURRENCY", "8")),
+    int(os.getenv("REPORT_MAX_QUEUE", "16")),
+    float(os.getenv("REPORT_QUEUE_TIMEOUT", "10")),
+)
+REPORT_RATE_LIMITER = TokenBucketLimiter(  # REPORT_RATE_PER_MIN<=0 이면 제한 없음
+    rate=float(os.getenv("REPORT_RATE_PER_MIN", "6")) / 60,
+    burst=int(os.getenv("REPORT_RATE_BURST", "3")),
+)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.detail, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def _client_key(request: Request) -> str:
+    # X-Forwarded-For를 직접 읽지 않음 → uvicorn --proxy-headers가 client.host를 실제 클라이언트로 설정
+    # (Railway 엣지 프록시로만 접근 가능하고 고정 IP가 없으므로 --forwarded-allow-ips='*')
+    return request.client.host if request.client else "unknown"
+
 class ReportReq(BaseModel):
     kind: str  # daily | weekly | monthly
     mode: str | None = "analysis"  # data | analysis
 
+RISK_PREFS = ("보수", "중립", "공격")
+
+class ProfileReq(BaseModel):
+    name: str
+    risk_pref: str = "중립"  # 보수 | 중립 | 공격
+    interests: list[str] = []
+
+class BatchReportReq(BaseModel):
+    kind: str  # daily | weekly | monthly
+    profile_ids: list[int] | None = None  # 없으면 저장된 전체 프로필
+
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/metrics/admission")
+def admission_metrics():
+    return {
+        "report": REPORT_ADMISSION.metrics(),
+        "llm": LLM_ADMISSION.metrics(),
+        "rate_limit": REPORT_RATE_LIMITER.metrics(),
+    }
+
 @app.get("/reports")
-def get_reports(kind: str | None = None, mode: str | None = None):
-    return {"items": list_reports(kind, mode)}
+def get_reports(kind: str | None = None, mode: str | None = None, profile_id: int | None = None):
+    return {"items": list_reports(kind, mode, profile_id)}
+
+# 🆕 리포트 아카이브 스트리밍 내보내기
+EXPORT_COLUMNS = ["id", "kind", "mode", "date", "title", "markdown", "sources", "created_at", "profile_id"]
+EXPORT_CHUNK_SIZE = 500
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+def _iter_csv(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row = {**row, "sources": json.dumps(row["sources"], ensure_ascii=False)}
+        writer.writerow([row[c] for c in EXPORT_COLUMNS])
+        yield buf.getvalue()
+        buf.seek(0); buf.truncate(0)
+    # 빈 아카이브여도 헤더는 내보냄
+    if buf.tell():
+        yield buf.getvalue()
+
+def _parse_export_date(value: str | None) -> str | None:
+    # fromisoformat은 20240101, 2024-W01-1도 허용 → 저장 형식(YYYY-MM-DD)으로 정규화해 문자열 비교가 맞도록 함
+    if not value:
+        return None
+    try:
+        return dt.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date_from/date_to must be YYYY-MM-DD")
+
+@app.get("/reports/export")
+def export_reports(
+    fmt: str = "ndjson",
+    kind: str | None = None,
+    mode: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+):
+    """
+    리포트 아카이브 전체를 NDJSON 또는 CSV로 스트리밍
+    - 커서로 EXPORT_CHUNK_SIZE 행씩 읽어 즉시 전송 (메모리 일정)
+    - date_from/date_to: YYYY-MM-DD (양끝 포함)
+    """
+    date_from, date_to = _parse_export_date(date_from), _parse_export_date(date_to)
+    rows = iter_reports(kind, mode, date_from, date_to, chunk_size=EXPORT_CHUNK_SIZE)
+    if fmt == "ndjson":
+        return StreamingResponse(
+            _iter_ndjson(rows),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="reports.ndjson"'},
+        )
+    elif fmt == "csv":
+        return StreamingResponse(
+            _iter_csv(rows),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="reports.csv"'},
+        )
+    else:
+        raise HTTPException(status_code=400, detail="fmt must be ndjson|csv")
+
+# 🆕 사용자 프로필 관리
+@app.get("/profiles")
+def get_profiles():
+    return {"items": list_profiles()}
+
+@app.post("/profiles")
+def create_profile(req: ProfileReq):
+    name = req.name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="name must not be empty")
+    if req.risk_pref not in RISK_PREFS:
+        raise HTTPException(status_code=400, detail="risk_pref must be 보수|중립|공격")
+    interests = [i.strip() for i in req.interests if i.strip()]
+    created_at = dt.datetime.now().isoformat()
+    pid = save_profile(name, req.risk_pref, interests, created_at)
+    return {"id": pid, "name": name, "risk_pref": req.risk_pref, "interests": interests, "created_at": created_at}
+
+@app.delete("/profiles/{pid}")
+def remove_profile(pid: int):
+    if not delete_profile(pid):
+        raise HTTPException(status_code=404, detail="profile not found")
+    return {"ok": True}
 
 @app.post("/report")
-async def create_report(req: ReportReq):
+async def create_report(req: ReportReq, request: Request):
     kind = req.kind.lower()
     mode = (req.mode or "analysis").lower()
     if kind not in ("daily", "weekly", "monthly"):
@@ -204,6 +332,11 @@ async def create_report(req: ReportReq):
     if mode not in ("data", "analysis"):
         return {"error": "mode must be data|analysis"}
 
+    REPORT_RATE_LIMITER.acquire(_client_key(request))
+    async with REPORT_ADMISSION.slot():
+        return await _generate_report(kind, mode)
+
+async def _generate_report(kind: str, mode: str) -> dict:
     data = await build_inputs(kind)
 
     if mode == "data":
@@ -221,6 +354,56 @@ async def create_report(req: ReportReq):
 
     return {"id": rid, "title": title, "date": data["date"], "mode": mode, "markdown": md, "sources": sources}
 
+# 🆕 여러 프로필 일괄 해석 리포트 (데이터 수집 1회 공유)
+@app.post("/report/batch")
+async def create_batch_report(req: BatchReportReq, request: Request):
+    """
+    kind 기준으로 입력 데이터를 한 번만 수집한 뒤,
+    저장된 프로필별 맞춤 해석 리포트를 동시에 생성하여 각각 저장
+    """
+    kind = req.kind.lower()
+    if kind not in ("daily", "weekly", "monthly"):
+        return {"error": "kind must be daily|weekly|monthly"}
+
+    profiles = list_profiles()
+    if req.profile_ids is not None:
+        wanted = set(req.profile_ids)
+        missing = sorted(wanted - {p["id"] for p in profiles})
+        if missing:
+            raise HTTPException(status_code=404, detail=f"unknown profile_ids: {missing}")
+        profiles = [p for p in profiles if p["id"] in wanted]
+    if not profiles:
+        raise HTTPException(status_code=400, detail="no user profiles to generate reports for")
+
+    REPORT_RATE_LIMITER.acquire(_client_key(request))
+    async with REPORT_ADMISSION.slot():
+        data = await build_inputs(kind)
+        results, refused = await run_profile_analyses(data, profiles)
+
+    # 전부 거절된 경우만 429, 일부 거절이면 성공분 저장 후 거절 목록 반환
+    if not results:
+        raise refused[0][1]
+
+    created_at = dt.datetime.now().isoformat()
+    sources = [h.get("url", "") for h in data.get("headlines", []) if h.get("url")]
+    items = []
+    for profile, md in results:
+        title = f"{kind.capitalize()} Report — {data['date']} ({profile['name']})"
+        rid = save_report(kind, "analysis", data["date"], title, md, sources, created_at, profile["id"])
+        items.append({"id": rid, "profile_id": profile["id"], "title": title, "markdown": md})
+
+    return {
+        "date": data["date"],
+        "kind": kind,
+        "count": len(items),
+        "sources": sources,
+        "items": items,
+        "refused": [
+            {"profile_id": p["id"], "detail": e.detail, "retry_after": e.retry_after}
+            for p, e in refused
+        ],
+    }
+
 @app.get("/report/{rid}")
 def get_report_by_id(rid: int):
     items = list_reports()
@@ -229,23 +412,49 @@ def get_report_by_id(rid: int):
             return it
     raise HTTPException(status_code=404, detail="report not found")
 
+# 🆕 트렌드 조회 제한 (수십 년 범위 허용, 응답 크기는 max_points로 제한)
+MAX_TREND_DAYS = 365 * 60
+MAX_TREND_POINTS = 5000
+DEFAULT_TREND_POINTS = 1000  # max_points 생략 시 적용 (대시보드 기본값)
+
+def _validate_trend_params(days: int, max_points: int | None, freq: str | None, agg: str) -> int:
+    """파라미터 검증 후 실제 적용할 포인트 상한 반환"""
+    if days < 1 or days > MAX_TREND_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_TREND_DAYS}")
+    if max_points is not None and not (3 <= max_points <= MAX_TREND_POINTS):
+        raise HTTPException(status_code=400, detail=f"max_points must be between 3 and {MAX_TREND_POINTS}")
+    if freq is not None and freq not in TREND_FREQS:
+        raise HTTPException(status_code=400, detail="freq must be weekly|monthly")
+    if agg not in TREND_AGGS:
+        raise HTTPException(status_code=400, detail="agg must be mean|last")
+    return max_points or DEFAULT_TREND_POINTS
+
 # 🆕 트렌드 데이터 API 엔드포인트
 @app.get("/trends/{series_id}")
-async def get_trend_data(series_id: str, days: int = 30):
+async def get_trend_data(
+    series_id: str,
+    days: int = 30,
+    max_points: int | None = None,
+    freq: str | None = None,
+    agg: str = "mean",
+):
     """
     FRED 시계열 데이터의 트렌드 조회
     
     Parameters:
     - series_id: FRED 시리즈 ID (예: DGS10, DEXKOUS, CPIAUCSL, UNRATE, FEDFUNDS)
-    - days: 조회할 기간 (기본 30일)
+    - days: 조회할 기간 (기본 30일, 최대 60년)
+    - max_points: 반환 포인트 상한 (LTTB 다운샘플링, 3~5000, 생략 시 1000)
+    - freq: weekly | monthly 집계 (라벨은 기간 시작일)
+    - agg: 집계 방식 mean | last (기본 mean)
     
     Returns:
     - data: [{"date": "YYYY-MM-DD", "value": float}, ...]
     - series_id: 조회한 시리즈 ID
     - count: 데이터 포인트 개수
+    - raw_count: 집계/다운샘플링 전 포인트 개수
     """
-    if days < 1 or days > 365:
-        raise HTTPException(status_code=400, detail="days must be between 1 and 365")
+    max_points = _validate_trend_params(days, max_points, freq, agg)
     
     try:
         trend_data = await fred_historical(series_id, days)
@@ -258,30 +467,40 @@ async def get_trend_data(series_id: str, days: int = 30):
                 "message": "No data available for this series"
             }
         
+        shaped = shape_trend(trend_data, freq, agg, max_points)
         return {
             "series_id": series_id,
-            "data": trend_data,
-            "count": len(trend_data),
-            "period_days": days
+            "data": shaped,
+            "count": len(shaped),
+            "raw_count": len(trend_data),
+            "period_days": days,
+            "freq": freq,
+            "agg": agg if freq else None,
+            "max_points": max_points
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch trend data: {str(e)}")
 
 # 🆕 여러 시리즈 일괄 조회 API
 @app.post("/trends/batch")
-async def get_batch_trends(series_ids: list[str], days: int = 30):
+async def get_batch_trends(
+    series_ids: list[str],
+    days: int = 30,
+    max_points: int | None = None,
+    freq: str | None = None,
+    agg: str = "mean",
+):
     """
     여러 FRED 시계열 데이터를 한 번에 조회
     
     Request Body:
     - series_ids: ["DGS10", "DEXKOUS", ...]
-    - days: 조회할 기간 (기본 30일)
+    - days / max_points / freq / agg: /trends/{series_id}와 동일
     
     Returns:
     - trends: {"DGS10": [...], "DEXKOUS": [...], ...}
     """
-    if days < 1 or days > 365:
-        raise HTTPException(status_code=400, detail="days must be between 1 and 365")
+    max_points = _validate_trend_params(days, max_points, freq, agg)
     
     if len(series_ids) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 series allowed per request")
@@ -290,7 +509,7 @@ async def get_batch_trends(series_ids: list[str], days: int = 30):
     for series_id in series_ids:
         try:
             trend_data = await fred_historical(series_id, days)
-            results[series_id] = trend_data
+            results[series_id] = shape_trend(trend_data, freq, agg, max_points)
         except Exception as e:
             print(f"Error fetching {series_id}: {e}")
             results[series_id] = []
@@ -298,6 +517,8 @@ async def get_batch_trends(series_ids: list[str], days: int = 30):
     return {
         "trends": results,
         "period_days": days,
+        "freq": freq,
+        "max_points": max_points,
         "requested_series": series_ids
     }
 
@@ -314,14 +535,7 @@ def export_report(rid: int, fmt: str = "md"):
         return FileResponse(str(fp), filename=fp.name, media_type="text/markdown")
     elif fmt == "pdf":
         fp = EXPORT_DIR / f"report_{rid}.pdf"
-        c = canvas.Canvas(str(fp), pagesize=A4)
-        width, height = A4; x, y = 40, height - 40
-        c.setFont("Helvetica", 11)
-        for line in (f"# {title}", "", *md.splitlines()):
-            if y < 40:
-                c.showPage(); c.setFont("Helvetica", 11); y = height - 40
-            c.drawString(x, y, line[:110]); y -= 16
-        c.save()
+        render_report_pdf(title, md, str(fp))
         return FileResponse(str(fp), filename=fp.name, media_type="application/pdf")
     else:
         raise HTTPException(status_code=400, detail="fmt must be md|pdf")
@@ -0,0 +1,95 @@
+"""
+PDF 렌더링 처리량 벤치마크
+
+    python bench_pdf.py                 # 기본 크기(10/100/500 섹션)
+    python bench_pdf.py --sections 1000 --runs 5 --json
+
+출력: 섹션 수, 페이지 수, 초당 페이지, 최대 메모리(tracemalloc, MiB)
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from pdf_render import render_report_pdf, korean_font
+
+def sample_markdown(sections: int) -> str:
+    """실제 리포트와 비슷한 구성(제목/표/목록/링크/긴 문단)의 합성 마크다운"""
+    parts = ["# DAILY 데이터 리포트", "**날짜**: 2026-01-02", "", "---", ""]
+    for i in range(1, sections + 1):
+        parts += [
+            f"## 📊 {i}. 시장 스냅샷",
+            "",
+            "| 지수 | 현재가 | 전일비 | 코멘트 |",
+            "|------|-------:|-------:|--------|",
+            *[f"| KOSPI-{j} | {2600 + j * 3.17:,.2f} | {j * 0.13 - 0.5:+.2f}% | 외국인 순매수 지속, 반도체 업종 강세 |" for j in range(8)],
+            "",
+            "### 거시 해석",
+            "",
+            "미국 10년물 국채 금리가 하락하면서 원/달러 환율이 안정세를 보였고, "
+            "수출 지표 개선과 함께 반도체 업황 회복 기대가 커지고 있습니다. "
+            "다만 부동산 시장은 금리 경로에 대한 불확실성으로 관망세가 이어지고 있어 "
+            "정책 발표와 가계부채 지표를 함께 확인할 필요가 있습니다. " * 2,
+            "",
+            "- **리스크 1**: 연준의 금리 인하 지연",
+            "- **리스크 2**: 중국 경기 둔화에 따른 수출 감소",
+            "  - 세부: 대중 반도체 수출 비중 확인",
+            "1. 관전 포인트: 다음 주 CPI 발표",
+            f"- **링크**: [https://www.yna.co.kr/view/AKR2026010200{i:04d}](https://www.yna.co.kr/view/AKR2026010200{i:04d})",
+            "",
+            "---",
+            "",
+        ]
+    return "\n".join(parts)
+
+def run(sections: int, runs: int, out_dir: Path) -> dict:
+    md = sample_markdown(sections)
+    fp = out_dir / f"bench_{sections}.pdf"
+
+    # 처리량: tracemalloc 오버헤드 없이 측정 (최솟값 사용)
+    best, pages = None, 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        pages = render_report_pdf("Benchmark Report", md, str(fp))
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    # 최대 메모리: 별도 1회 실행
+    tracemalloc.start()
+    render_report_pdf("Benchmark Report", md, str(fp))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "sections": sections,
+        "markdown_kb": round(len(md.encode("utf-8")) / 1024, 1),
+        "pages": pages,
+        "best_s": round(best, 4),
+        "pages_per_s": round(pages / best, 1),
+        "peak_mib": round(peak / 2**20, 2),
+        "pdf_kb": round(fp.stat().st_size / 1024, 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="PDF 렌더링 처리량 벤치마크")
+    ap.add_argument("--sections", type=int, nargs="*", default=[10, 100, 500])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="결과를 JSON 줄로 출력")
+    args = ap.parse_args()
+
+    korean_font()  # 폰트 등록 비용은 측정에서 제외
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sections:
+            res = run(n, args.runs, Path(tmp))
+            if args.json:
+                print(json.dumps(res))
+            else:
+                print(
+                    f"sections={res['sections']:>5}  pages={res['pages']:>5}  "
+                    f"{res['pages_per_s']:>7.1f} pages/s  peak={res['peak_mib']:>7.2f} MiB  "
+                    f"pdf={res['pdf_kb']} KB"
+                )
+
+if __name__ == "__main__":
+    main()
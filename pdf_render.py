@@ -0,0 +1,329 @@
+import os
+import re
+from typing import Iterator
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+# ---------------- 폰트 ----------------
+# 기본: 빌드 시 설치되는 나눔고딕(nixpacks.toml의 fonts-nanum)을 TTF 서브셋으로 임베딩
+# PDF_FONT_PATH로 다른 TTF 지정 가능
+# 폰트를 못 읽으면 내장 CID 폰트(HYGothic) 사용 → 임베딩되지 않아 뷰어에 한글 폰트가 없으면 깨짐
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
+PDF_FONT_PATH = os.getenv("PDF_FONT_PATH") or DEFAULT_FONT_PATH
+CID_FONT = "HYGothic-Medium"
+
+_font_name: str | None = None
+
+def korean_font() -> str:
+    """한글 폰트를 한 번만 등록하고 폰트 이름 반환"""
+    global _font_name
+    if _font_name:
+        return _font_name
+    try:
+        pdfmetrics.registerFont(TTFont("ReportKR", PDF_FONT_PATH))
+        _font_name = "ReportKR"
+        return _font_name
+    except Exception as e:
+        print(f"⚠️ PDF 폰트 등록 실패 ({PDF_FONT_PATH}): {e} - 임베딩되지 않는 CID 폰트({CID_FONT}) 사용")
+    pdfmetrics.registerFont(UnicodeCIDFont(CID_FONT))
+    _font_name = CID_FONT
+    return _font_name
+
+# ---------------- 마크다운 → 블록 ----------------
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_ORDERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+_HR = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_TABLE_SEP = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+# CID/일반 TTF 폰트에 없는 이모지·딩뱃 제거
+_UNSUPPORTED = re.compile("[\U00010000-\U0010FFFF\u2139\u2600-\u27BF\uFE0F\u200D]")
+
+def _split_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [c.strip() for c in line.split("|")]
+
+def parse_blocks(md: str) -> Iterator[dict]:
+    """
+    마크다운을 한 번 훑으면서 블록을 하나씩 yield
+    - heading: {"type": "heading", "level", "text"}
+    - paragraph: {"type": "paragraph", "text"}
+    - list_item: {"type": "list_item", "text", "marker", "indent"}
+    - table: {"type": "table", "header", "rows", "align"}
+    - hr / blank
+    """
+    lines = iter(md.splitlines())
+    para: list[str] = []
+    pending = None  # 표 헤더 후보
+
+    def flush_para():
+        if para:
+            text = " ".join(para)
+            para.clear()
+            return {"type": "paragraph", "text": text}
+        return None
+
+    for line in lines:
+        if pending is not None:
+            header, pending = pending, None
+            if _TABLE_SEP.match(line):
+                align = ["right" if c.endswith(":") and not c.startswith(":") else "left" for c in _split_row(line)]
+                rows = []
+                for row_line in lines:
+                    if "|" not in row_line or not row_line.strip():
+                        break
+                    rows.append(_split_row(row_line))
+                else:
+                    row_line = None
+                yield {"type": "table", "header": header, "rows": rows, "align": align}
+                if row_line is None or not row_line.strip():
+                    yield {"type": "blank"}
+                    continue
+                line = row_line
+            else:
+                para.append(" | ".join(header))
+
+        stripped = line.strip()
+        if not stripped:
+            b = flush_para()
+            if b: yield b
+            yield {"type": "blank"}
+            continue
+        if stripped.startswith("|") and "|" in stripped[1:]:
+            b = flush_para()
+            if b: yield b
+            pending = _split_row(stripped)
+            continue
+        m = _HEADING.match(stripped)
+        if m:
+            b = flush_para()
+            if b: yield b
+            yield {"type": "heading", "level": len(m.group(1)), "text": m.group(2)}
+            continue
+        if _HR.match(stripped):
+            b = flush_para()
+            if b: yield b
+            yield {"type": "hr"}
+            continue
+        m = _BULLET.match(line) or _ORDERED.match(line)
+        if m:
+            b = flush_para()
+            if b: yield b
+            if len(m.groups()) == 2:
+                yield {"type": "list_item", "text": m.group(2), "marker": "•", "indent": len(m.group(1)) // 2}
+            else:
+                yield {"type": "list_item", "text": m.group(3), "marker": f"{m.group(2)}.", "indent": len(m.group(1)) // 2}
+            continue
+        para.append(stripped)
+
+    if pending is not None:
+        para.append(" | ".join(pending))
+    b = flush_para()
+    if b: yield b
+
+def _inline_spans(text: str) -> list[tuple[str, str | None]]:
+    """인라인 마크다운 → [(텍스트, 링크 URL | None)] (굵게/코드 기호 제거)"""
+    text = _UNSUPPORTED.sub("", text)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: m.group(1) or m.group(2), text)
+    text = re.sub(r"`([^`]*)`", r"\1", text)
+    spans, pos = [], 0
+    for m in _LINK.finditer(text):
+        if m.start() > pos:
+            spans.append((text[pos:m.start()], None))
+        spans.append((m.group(1), m.group(2)))
+        pos = m.end()
+    if pos < len(text):
+        spans.append((text[pos:], None))
+    return spans
+
+# ---------------- 레이아웃 ----------------
+MARGIN = 48
+BODY_SIZE = 10.5
+TABLE_SIZE = 9
+HEADING_SIZES = {1: 18, 2: 15, 3: 13}
+LEADING = 1.45
+LINK_COLOR = (0.1, 0.3, 0.75)
+
+class PdfRenderer:
+    """
+    블록을 받는 즉시 배치/그리기 → 페이지가 차면 바로 showPage
+    (문서 전체 레이아웃 모델을 메모리에 만들지 않음)
+    """
+    def __init__(self, path: str, title: str):
+        self.font = korean_font()
+        self.c = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+        self.c.setTitle(title)
+        self.width, self.height = A4
+        self.left, self.right = MARGIN, self.width - MARGIN
+        self.pages = 0
+        self._start_page()
+
+    def _start_page(self):
+        self.pages += 1
+        self.y = self.height - MARGIN
+
+    def _new_page(self):
+        self._draw_footer()
+        self.c.showPage()
+        self._start_page()
+
+    def _draw_footer(self):
+        self.c.setFont(self.font, 8)
+        self.c.setFillColorRGB(0.5, 0.5, 0.5)
+        self.c.drawCentredString(self.width / 2, MARGIN / 2, str(self.pages))
+        self.c.setFillColorRGB(0, 0, 0)
+
+    def _ensure(self, h: float):
+        if self.y - h < MARGIN:
+            self._new_page()
+
+    def _wrap(self, spans, size: float, width: float) -> list[list[tuple[str, str | None]]]:
+        """스팬을 단어(→필요 시 글자) 단위로 줄바꿈"""
+        lines, cur, cur_w = [], [], 0.0
+        for text, url in spans:
+            for tok in re.findall(r"\S+\s*|\s+", text):
+                w = pdfmetrics.stringWidth(tok, self.font, size)
+                if cur_w + w <= width or (not cur and w <= width):
+                    cur.append((tok, url)); cur_w += w
+                    continue
+                if w <= width:
+                    lines.append(cur); cur, cur_w = [(tok, url)], w
+                    continue
+                for ch in tok:  # 한 단어가 줄보다 긴 경우 (긴 URL 등)
+                    cw = pdfmetrics.stringWidth(ch, self.font, size)
+                    if cur_w + cw > width and cur:
+                        lines.append(cur); cur, cur_w = [], 0.0
+                    cur.append((ch, url)); cur_w += cw
+        if cur:
+            lines.append(cur)
+        return lines
+
+    def _draw_line(self, line, x: float, y: float, size: float):
+        self.c.setFont(self.font, size)
+        # 같은 링크를 가진 연속 토큰은 한 번에 그림 (글자 단위 분할된 긴 URL 포함)
+        runs: list[tuple[str, str | None]] = []
+        for tok, url in line:
+            if runs and runs[-1][1] == url:
+                runs[-1] = (runs[-1][0] + tok, url)
+            else:
+                runs.append((tok, url))
+        for text, url in runs:
+            w = pdfmetrics.stringWidth(text, self.font, size)
+            if url:
+                self.c.setFillColorRGB(*LINK_COLOR)
+                self.c.drawString(x, y, text)
+                self.c.setFillColorRGB(0, 0, 0)
+                self.c.linkURL(url, (x, y - 2, x + w, y + size), relative=0)
+            else:
+                self.c.drawString(x, y, text)
+            x += w
+
+    def _text(self, text: str, size: float, indent: float = 0, marker: str | None = None):
+        x = self.left + indent
+        lh = size * LEADING
+        for i, line in enumerate(self._wrap(_inline_spans(text), size, self.right - x)):
+            self._ensure(lh)
+            self.y -= lh
+            if marker and i == 0:
+                self.c.setFont(self.font, size)
+                self.c.drawRightString(x - 4, self.y, marker)
+            self._draw_line(line, x, self.y, size)
+
+    def _table(self, block: dict):
+        header, rows, align = block["header"], block["rows"], block["align"]
+        ncol = max([len(header)] + [len(r) for r in rows])
+        grid = [[*r, *[""] * (ncol - len(r))] for r in [header, *rows]]
+        align = [*align, *["left"] * (ncol - len(align))]
+        cells = [[_UNSUPPORTED.sub("", "".join(t for t, _ in _inline_spans(c))) for c in r] for r in grid]
+
+        # 열 너비: 내용 최대 너비 비율로 가용 폭 분배
+        pad = 4
+        avail = self.right - self.left
+        natural = [max(pdfmetrics.stringWidth(r[i], self.font, TABLE_SIZE) for r in cells) + 2 * pad for i in range(ncol)]
+        total = sum(natural)
+        widths = natural if total <= avail else [avail * n / total for n in natural]
+
+        lh = TABLE_SIZE * LEADING
+
+        def layout(row):
+            wrapped = [self._wrap([(txt, None)], TABLE_SIZE, widths[i] - 2 * pad) or [[]] for i, txt in enumerate(row)]
+            return wrapped, max(len(w) for w in wrapped) * lh + pad
+
+        def draw_row(wrapped, h, shade):
+            top = self.y
+            x = self.left
+            if shade:
+                self.c.setFillColorRGB(0.93, 0.93, 0.93)
+                self.c.rect(self.left, top - h, sum(widths), h, stroke=0, fill=1)
+                self.c.setFillColorRGB(0, 0, 0)
+            for i, lines in enumerate(wrapped):
+                ly = top
+                for line in lines:
+                    ly -= lh
+                    tw = sum(pdfmetrics.stringWidth(t, self.font, TABLE_SIZE) for t, _ in line)
+                    tx = x + widths[i] - pad - tw if align[i] == "right" else x + pad
+                    self._draw_line(line, tx, ly + 2, TABLE_SIZE)
+                self.c.rect(x, top - h, widths[i], h, stroke=1, fill=0)
+                x += widths[i]
+            self.y = top - h
+
+        self.c.setLineWidth(0.5)
+        self.c.setStrokeColorRGB(0.6, 0.6, 0.6)
+        head = layout(cells[0])
+        self._ensure(head[1] + lh)
+        draw_row(*head, True)
+        for row in cells[1:]:
+            wrapped, h = layout(row)
+            if self.y - h < MARGIN:
+                self._new_page()
+                draw_row(*head, True)  # 새 페이지에서 헤더 반복
+            draw_row(wrapped, h, False)
+        self.c.setStrokeColorRGB(0, 0, 0)
+        self.y -= lh / 2
+
+    def add(self, block: dict):
+        t = block["type"]
+        if t == "heading":
+            size = HEADING_SIZES.get(block["level"], BODY_SIZE + 1)
+            self._ensure(size * LEADING * 2)  # 제목만 페이지 끝에 남지 않도록
+            self.y -= size * 0.4
+            self._text(block["text"], size)
+        elif t == "paragraph":
+            self._text(block["text"], BODY_SIZE)
+        elif t == "list_item":
+            indent = 14 + 14 * block["indent"]
+            self._text(block["text"], BODY_SIZE, indent=indent, marker=block["marker"])
+        elif t == "table":
+            self._ensure(BODY_SIZE * LEADING)
+            self.y -= BODY_SIZE * 0.3
+            self._table(block)
+        elif t == "hr":
+            self._ensure(12)
+            self.y -= 6
+            self.c.setStrokeColorRGB(0.75, 0.75, 0.75)
+            self.c.line(self.left, self.y, self.right, self.y)
+            self.c.setStrokeColorRGB(0, 0, 0)
+            self.y -= 6
+        elif t == "blank":
+            self.y -= BODY_SIZE * 0.5
+
+    def finish(self) -> int:
+        self._draw_footer()
+        self.c.showPage()
+        self.c.save()
+        return self.pages
+
+def render_report_pdf(title: str, md: str, path: str) -> int:
+    """리포트 마크다운을 PDF로 렌더링, 페이지 수 반환"""
+    r = PdfRenderer(path, title)
+    r.add({"type": "heading", "level": 1, "text": title})
+    for block in parse_blocks(md):
+        r.add(block)
+    return r.finish()
@@ -1,15 +1,31 @@
-import os, datetime as dt, math
+import os, datetime as dt, math, re, hashlib, json
 import asyncio
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
 from datetime import timedelta
 import httpx
 import feedparser
 from openai import OpenAI
+from storage import save_headlines, list_headlines, save_ecos_observations, latest_ecos_observation
+from admission import AdmissionController, Overloaded
 
 OPENAI = os.getenv("OPENAI_API_KEY")
 CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
 ECOS_KEY = os.getenv("ECOS_KEY")
 FRED_KEY = os.getenv("FRED_KEY")
 ALPHA_VANTAGE_KEY = os.getenv("ALPHA_VANTAGE_KEY")  # 🆕 Alpha Vantage API 키
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # 🆕 동시 LLM 호출 수
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))  # 🆕 LLM 호출 대기열 크기
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))  # 🆕 LLM 대기 최대 시간(초)
+
+# 🆕 프로세스 전체 LLM 호출 수용 제어 (단건/일괄 리포트 공통)
+LLM_ADMISSION = AdmissionController("llm", LLM_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
+
+# 저장된 프로필이 없을 때 사용하는 기본 사용자 프로필
+DEFAULT_PROFILE = {
+    "name": "Junki",
+    "risk_pref": "중립",
+    "interests": ["반도체", "부동산"]
+}
 
 # ---------------- Alpha Vantage 주식 데이터 (무료, 25회/일) ----------------
 async def fetch_alpha_vantage_quote(symbol: str):
@@ -82,66 +98,154 @@ async def fetch_market_indices():
     return indices
 
 # ---------------- RSS 뉴스 수집 (무료) ----------------
-async def fetch_rss_news(kind: str) -> list[dict]:
+# kind별 (조회 기간 일수, 구간 길이 일수, 구간당 헤드라인 수)
+# → 기간 전체에 고르게 분배 (주간: 하루 2건 × 7일, 월간: 주 4건 × 5구간)
+HEADLINE_WINDOWS = {
+    "daily": (1, 1, 10),
+    "weekly": (7, 1, 2),
+    "monthly": (30, 7, 4),
+}
+HEADLINE_DUP_THRESHOLD = 0.6  # 제목 bigram 유사도가 이 이상이면 같은 기사로 간주
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+def _normalize_url(url: str) -> str:
+    """호스트 소문자화, fragment/추적 파라미터/끝 슬래시 제거"""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    ]
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def _normalize_title(title: str) -> str:
+    """[속보] 같은 말머리, Google News의 ' - 매체명' 접미사, 기호/공백 제거"""
+    t = re.sub(r"^\s*[\[(【][^\])】]*[\])】]\s*", "", title)
+    t = re.sub(r"\s+-\s+[^-]+$", "", t)
+    return re.sub(r"[\W_]+", "", t.lower())
+
+def _headline_id(title: str, url: str) -> str:
+    key = _normalize_url(url) if url else _normalize_title(title)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def _entry_published(entry, fallback: dt.datetime) -> str:
+    """feedparser 엔트리의 발행 시각 → ISO8601 UTC (없으면 수집 시각)"""
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        return dt.datetime(*parsed[:6], tzinfo=dt.timezone.utc).isoformat()
+    return fallback.isoformat()
+
+def _parse_feed(url: str, source: str, topic: str, fetched: dt.datetime) -> list[dict]:
+    feed = feedparser.parse(url)
+    items = []
+    for entry in feed.entries:
+        title = entry.get("title", "제목 없음")
+        link = entry.get("link", "")
+        items.append({
+            "id": _headline_id(title, link),
+            "topic": topic,
+            "title": title,
+            "url": link,
+            "source": source,
+            "published_at": _entry_published(entry, fetched),
+            "fetched_at": fetched.isoformat(),
+        })
+    return items
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+def dedupe_headlines(headlines: list[dict], threshold: float = HEADLINE_DUP_THRESHOLD) -> list[dict]:
     """
-    RSS 피드에서 최신 뉴스를 수집합니다.
-    ⚠️ STUB 제거: 실패시 빈 배열 반환
+    제목이 거의 같은 헤드라인을 하나로 합침 (앞쪽 = 최신 항목 유지)
+    - 정규화 제목의 문자 bigram Jaccard 유사도 기준
+    - bigram 역색인으로 겹치는 bigram이 있는 항목끼리만 비교 (월간 수천 건 대응)
+    """
+    kept, kept_grams = [], []
+    index: dict[str, list[int]] = {}
+    for h in headlines:
+        grams = _bigrams(_normalize_title(h.get("title", "")))
+        shared: dict[int, int] = {}
+        for g in grams:
+            for k in index.get(g, ()):
+                shared[k] = shared.get(k, 0) + 1
+        if any(n / (len(grams) + len(kept_grams[k]) - n) >= threshold for k, n in shared.items()):
+            continue
+        for g in grams:
+            index.setdefault(g, []).append(len(kept))
+        kept.append(h)
+        kept_grams.append(grams)
+    return kept
+
+def pick_across_window(headlines: list[dict], now: dt.datetime, bucket_days: int, per_bucket: int) -> list[dict]:
+    """
+    최신순 헤드라인을 bucket_days 단위 구간으로 나눠 구간마다 최신 per_bucket건씩 선택
+    - 주간/월간 리포트가 오늘 기사에만 쏠리지 않도록 기간 전체에서 고르게 선택
     """
-    news_sources = []
+    counts: dict[int, int] = {}
+    picked = []
+    for h in headlines:
+        age = now - dt.datetime.fromisoformat(h["published_at"])
+        bucket = max(0, age.days) // bucket_days
+        if counts.get(bucket, 0) < per_bucket:
+            counts[bucket] = counts.get(bucket, 0) + 1
+            picked.append(h)
+    return picked
+
+async def ingest_rss_news(kind: str) -> int:
+    """
+    RSS 피드 전체 엔트리를 헤드라인 저장소에 누적 (중복 id는 무시)
+    - 연합뉴스/한국경제는 topic "all", kind별 Google News 검색은 topic = kind
+    - 반환: 새로 저장된 건수
+    """
+    fetched = dt.datetime.now(dt.timezone.utc)
     
-    try:
-        # 1. 연합뉴스 RSS
-        yna_feed = feedparser.parse("https://www.yna.co.kr/rss/all.xml")
-        for entry in yna_feed.entries[:5]:
-            news_sources.append({
-                "title": entry.get("title", "제목 없음"),
-                "url": entry.get("link", ""),
-                "source": "연합뉴스",
-                "date": entry.get("published", "")
-            })
-    except Exception as e:
-        print(f"연합뉴스 RSS 오류: {e}")
+    # Google News RSS (경제 키워드)
+    if kind == "daily":
+        query = "KOSPI OR KOSDAQ OR 한국경제 OR 증시"
+    elif kind == "weekly":
+        query = "수출 OR 무역 OR 산업동향"
+    else:
+        query = "경제전망 OR 금리 OR 인플레이션"
     
-    try:
-        # 2. 한국경제 RSS
-        hankyung_feed = feedparser.parse("https://www.hankyung.com/feed/")
-        for entry in hankyung_feed.entries[:5]:
-            news_sources.append({
-                "title": entry.get("title", "제목 없음"),
-                "url": entry.get("link", ""),
-                "source": "한국경제",
-                "date": entry.get("published", "")
-            })
-    except Exception as e:
-        print(f"한국경제 RSS 오류: {e}")
+    feeds = [
+        ("https://www.yna.co.kr/rss/all.xml", "연합뉴스", "all"),
+        ("https://www.hankyung.com/feed/", "한국경제", "all"),
+        (f"https://news.google.com/rss/search?q={quote(query)}&hl=ko&gl=KR&ceid=KR:ko", "Google News", kind),
+    ]
     
-    try:
-        # 3. Google News RSS (경제 키워드)
-        if kind == "daily":
-            query = "KOSPI OR KOSDAQ OR 한국경제 OR 증시"
-        elif kind == "weekly":
-            query = "수출 OR 무역 OR 산업동향"
-        else:
-            query = "경제전망 OR 금리 OR 인플레이션"
-        
-        google_url = f"https://news.google.com/rss/search?q={query}&hl=ko&gl=KR&ceid=KR:ko"
-        google_feed = feedparser.parse(google_url)
-        for entry in google_feed.entries[:5]:
-            news_sources.append({
-                "title": entry.get("title", "제목 없음"),
-                "url": entry.get("link", ""),
-                "source": "Google News",
-                "date": entry.get("published", "")
-            })
-    except Exception as e:
-        print(f"Google News RSS 오류: {e}")
+    items = []
+    for url, source, topic in feeds:
+        try:
+            items.extend(await asyncio.to_thread(_parse_feed, url, source, topic, fetched))
+        except Exception as e:
+            print(f"{source} RSS 오류: {e}")
+    
+    return save_headlines(items) if items else 0
+
+async def fetch_rss_news(kind: str) -> list[dict]:
+    """
+    RSS 피드를 저장소에 누적한 뒤, kind의 기간(일/주/월) 헤드라인을 조회합니다.
+    - 공통 피드 + 해당 kind의 검색 피드만 사용 (다른 kind 검색 결과는 제외)
+    - 기간 전체에서 유사 제목을 합친 뒤 구간별로 고르게 선택
+    ⚠️ STUB 제거: 실패시 빈 배열 반환
+    """
+    await ingest_rss_news(kind)
+    
+    days, bucket_days, per_bucket = HEADLINE_WINDOWS.get(kind, HEADLINE_WINDOWS["daily"])
+    now = dt.datetime.now(dt.timezone.utc)
+    rows = list_headlines((now - timedelta(days=days)).isoformat(), ["all", kind])
     
     # ⚠️ STUB 제거: 실패시 빈 배열 반환
-    if not news_sources:
-        print("⚠️ 모든 RSS 피드 실패 - 빈 배열 반환")
+    if not rows:
+        print("⚠️ 기간 내 헤드라인 없음 - 빈 배열 반환")
         return []
     
-    return news_sources[:10]  # 최대 10개 반환
+    return [
+        {"title": h["title"], "url": h["url"], "source": h["source"], "date": h["published_at"]}
+        for h in pick_across_window(dedupe_headlines(rows), now, bucket_days, per_bucket)
+    ]
 
 # ---------------- FRED helpers ----------------
 async def fred_latest(series_id: str):
@@ -209,6 +313,80 @@ async def fred_historical(series_id: str, days: int = 30):
         print(f"FRED 히스토리컬 API 오류 ({series_id}): {e}")
         return []
 
+# ---------------- 트렌드 후처리 (집계/다운샘플링) ----------------
+TREND_FREQS = ("weekly", "monthly")
+TREND_AGGS = ("mean", "last")
+
+def _period_start(date: str, freq: str) -> str:
+    d = dt.date.fromisoformat(date)
+    if freq == "weekly":
+        return (d - timedelta(days=d.weekday())).isoformat()  # 해당 주 월요일
+    return d.replace(day=1).isoformat()  # 해당 월 1일
+
+def resample_series(points: list[dict], freq: str, how: str = "mean") -> list[dict]:
+    """
+    날짜순 시계열을 주/월 단위로 집계
+    - freq: weekly | monthly (라벨은 기간 시작일)
+    - how: mean(평균) | last(기간 마지막 값)
+    """
+    out = []
+    bucket, values = None, []
+    for p in points + [None]:
+        key = _period_start(p["date"], freq) if p else None
+        if key != bucket and values:
+            value = sum(values) / len(values) if how == "mean" else values[-1]
+            out.append({"date": bucket, "value": round(value, 6)})
+            values = []
+        if p:
+            bucket = key
+            values.append(p["value"])
+    return out
+
+def downsample_lttb(points: list[dict], max_points: int) -> list[dict]:
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링
+    - 첫/마지막 점은 유지, 나머지는 버킷마다 시각적으로 가장 중요한 점 1개 선택
+    - x축은 날짜 서수(ordinal) 사용
+    """
+    n = len(points)
+    if max_points >= n or max_points < 3:
+        return points
+
+    xs = [dt.date.fromisoformat(p["date"]).toordinal() for p in points]
+    ys = [p["value"] for p in points]
+    sampled = [points[0]]
+    every = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        # 다음 버킷 평균점
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        if nxt_start >= nxt_end:
+            nxt_start, nxt_end = n - 1, n
+        avg_x = sum(xs[nxt_start:nxt_end]) / (nxt_end - nxt_start)
+        avg_y = sum(ys[nxt_start:nxt_end]) / (nxt_end - nxt_start)
+
+        # 현재 버킷에서 삼각형 넓이가 최대인 점 선택
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+def shape_trend(points: list[dict], freq: str | None = None, how: str = "mean", max_points: int | None = None) -> list[dict]:
+    """집계(freq) → 다운샘플링(max_points) 순으로 적용"""
+    if freq:
+        points = resample_series(points, freq, how)
+    if max_points:
+        points = downsample_lttb(points, max_points)
+    return points
+
 async def enrich_with_fred(data: dict) -> dict:
     """실제 FRED 데이터로 보강 (스텁 없음)"""
     
@@ -261,28 +439,151 @@ async def enrich_with_fred(data: dict) -> dict:
     return data
 
 # ---------------- ECOS(옵션) ----------------
-async def ecos_korea_cpi_latest():
-    if not ECOS_KEY: return None
-    url = f"https://ecos.bok.or.kr/api/StatisticSearch/{ECOS_KEY}/json/kr/1/2/901Y014/M/2020/2030/"
+# 한국은행 ECOS 통계 카탈로그 (ECOS_CATALOGUE 환경변수에 같은 형식의 JSON으로 대체 가능)
+# - cycle: D(일) | M(월) | Q(분기) | A(연)
+DEFAULT_ECOS_CATALOGUE = [
+    {"name": "한국은행 기준금리", "stat_code": "722Y001", "cycle": "M", "item_code": "0101000"},
+    {"name": "국고채 3년 금리", "stat_code": "817Y002", "cycle": "D", "item_code": "010200000"},
+    {"name": "국고채 10년 금리", "stat_code": "817Y002", "cycle": "D", "item_code": "010210000"},
+    {"name": "수출금액 (통관)", "stat_code": "901Y011", "cycle": "M", "item_code": "FIEAA"},
+    {"name": "Korea CPI (ECOS)", "stat_code": "901Y009", "cycle": "M", "item_code": "0"},
+]
+ECOS_CYCLES = ("D", "M", "Q", "A")
+ECOS_CATALOGUE_FIELDS = ("name", "stat_code", "cycle", "item_code")
+
+def _load_ecos_catalogue() -> list[dict]:
+    """ECOS_CATALOGUE 환경변수 검증, 잘못되면 경고 후 기본 카탈로그 사용"""
+    raw = os.getenv("ECOS_CATALOGUE")
+    if not raw:
+        return DEFAULT_ECOS_CATALOGUE
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            r = await client.get(url)
-            r.raise_for_status()
-            j = r.json()
-        row = j["StatisticSearch"]["row"][-1]
-        return {"value": float(row["DATA_VALUE"]), "date": row["TIME"]}
-    except Exception as e:
-        print(f"ECOS API 오류: {e}")
-        return None
+        catalogue = json.loads(raw)
+        if not isinstance(catalogue, list) or not catalogue:
+            raise ValueError("비어 있지 않은 JSON 배열이어야 함")
+        for i, spec in enumerate(catalogue):
+            if not isinstance(spec, dict):
+                raise ValueError(f"{i}번 항목이 객체가 아님")
+            missing = [f for f in ECOS_CATALOGUE_FIELDS if not isinstance(spec.get(f), str) or not spec[f]]
+            if missing:
+                raise ValueError(f"{i}번 항목에 {', '.join(missing)} 없음")
+            if spec["cycle"] not in ECOS_CYCLES:
+                raise ValueError(f"{i}번 항목 cycle은 D|M|Q|A 중 하나여야 함")
+        return catalogue
+    except ValueError as e:  # json.JSONDecodeError 포함
+        print(f"⚠️ ECOS_CATALOGUE 설정 오류: {e} - 기본 카탈로그 사용")
+        return DEFAULT_ECOS_CATALOGUE
 
-async def enrich_with_ecos(data: dict) -> dict:
-    kcpi = await ecos_korea_cpi_latest()
-    if kcpi:
-        data.setdefault("macro", []).append({
-            "name": "Korea CPI (ECOS)", 
-            "latest": kcpi["value"], 
-            "note": kcpi["date"]
+ECOS_CATALOGUE = _load_ecos_catalogue()
+ECOS_CONCURRENCY = int(os.getenv("ECOS_CONCURRENCY", "4"))
+ECOS_MAX_ROWS = 10000
+ECOS_REVISION_OVERLAP = 3  # 매 동기화마다 다시 받는 최근 기간 수 (잠정치 수정 반영)
+# 로컬 데이터가 없을 때 첫 수집 기간 (일)
+ECOS_INITIAL_LOOKBACK_DAYS = {"D": 365 * 2, "M": 365 * 5, "Q": 365 * 10, "A": 365 * 20}
+
+def _ecos_period(d: dt.date, cycle: str) -> str:
+    """날짜 → ECOS TIME 형식"""
+    if cycle == "D":
+        return d.strftime("%Y%m%d")
+    if cycle == "M":
+        return d.strftime("%Y%m")
+    if cycle == "Q":
+        return f"{d.year}Q{(d.month - 1) // 3 + 1}"
+    return str(d.year)
+
+def _ecos_shift_period(time: str, cycle: str, n: int) -> str:
+    """ECOS TIME을 n기간 이동 (음수면 과거)"""
+    if cycle == "D":
+        return _ecos_period(dt.datetime.strptime(time, "%Y%m%d").date() + timedelta(days=n), cycle)
+    if cycle == "M":
+        idx = int(time[:4]) * 12 + int(time[4:6]) - 1 + n
+        return f"{idx // 12}{idx % 12 + 1:02d}"
+    if cycle == "Q":
+        idx = int(time[:4]) * 4 + int(time[-1]) - 1 + n
+        return f"{idx // 4}Q{idx % 4 + 1}"
+    return str(int(time) + n)
+
+async def ecos_sync_series(client: httpx.AsyncClient, spec: dict) -> int:
+    """
+    카탈로그 항목 1개를 로컬 마지막 관측치 부근부터 받아서 저장
+    - 마지막 ECOS_REVISION_OVERLAP기간은 다시 받아 잠정치 수정을 반영
+    - 반환: 저장한 관측치 수
+    """
+    stat, item, cycle = spec["stat_code"], spec["item_code"], spec["cycle"]
+    today = dt.datetime.now().date()
+    end = _ecos_period(today, cycle)
+    last = latest_ecos_observation(stat, item, cycle)
+    if last:
+        start = _ecos_shift_period(last["time"], cycle, -ECOS_REVISION_OVERLAP)
+    else:
+        start = _ecos_period(today - timedelta(days=ECOS_INITIAL_LOOKBACK_DAYS.get(cycle, 365 * 5)), cycle)
+    # 같은 형식의 TIME 문자열은 사전순 = 시간순
+    if start > end:
+        return 0
+
+    url = (
+        f"https://ecos.bok.or.kr/api/StatisticSearch/{ECOS_KEY}/json/kr/1/{ECOS_MAX_ROWS}"
+        f"/{stat}/{cycle}/{start}/{end}/{item}"
+    )
+    r = await client.get(url)
+    r.raise_for_status()
+    j = r.json()
+
+    # 신규 데이터가 없으면 {"RESULT": {"CODE": "INFO-200", ...}}
+    rows = j.get("StatisticSearch", {}).get("row", [])
+    if not rows:
+        result = j.get("RESULT", {})
+        if result and result.get("CODE") != "INFO-200":
+            print(f"ECOS 응답 오류 ({spec['name']}): {result.get('MESSAGE')}")
+        return 0
+
+    fetched_at = dt.datetime.now().isoformat()
+    obs = []
+    for row in rows:
+        try:
+            value = float(row["DATA_VALUE"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        obs.append({
+            "stat_code": stat, "item_code": item, "cycle": cycle,
+            "time": row["TIME"], "value": value, "fetched_at": fetched_at
         })
+    return save_ecos_observations(obs) if obs else 0
+
+async def ecos_sync_all(catalogue: list[dict] | None = None) -> dict:
+    """
+    카탈로그 전체를 동시에 증분 동기화 (동시 요청 수는 ECOS_CONCURRENCY로 제한)
+    - 반환: {"이름": 저장 건수 | None(실패)}
+    """
+    catalogue = catalogue or ECOS_CATALOGUE
+    if not ECOS_KEY:
+        print("⚠️ ECOS_KEY 없음 - ECOS 동기화 스킵")
+        return {}
+
+    sem = asyncio.Semaphore(max(1, ECOS_CONCURRENCY))
+
+    async def _one(client, spec):
+        async with sem:
+            try:
+                return await ecos_sync_series(client, spec)
+            except Exception as e:
+                print(f"ECOS API 오류 ({spec['name']}): {e}")
+                return None
+
+    async with httpx.AsyncClient(timeout=20) as client:
+        counts = await asyncio.gather(*(_one(client, spec) for spec in catalogue))
+    return {spec["name"]: n for spec, n in zip(catalogue, counts)}
+
+async def enrich_with_ecos(data: dict) -> dict:
+    """ECOS 증분 동기화 후 로컬 테이블의 최신 관측치로 보강"""
+    await ecos_sync_all()
+    for spec in ECOS_CATALOGUE:
+        last = latest_ecos_observation(spec["stat_code"], spec["item_code"], spec["cycle"])
+        if last:
+            data.setdefault("macro", []).append({
+                "name": spec["name"], 
+                "latest": last["value"], 
+                "note": last["time"]
+            })
     return data
 
 # ---------------- 입력 데이터 구성 ----------------
@@ -290,6 +591,7 @@ async def build_inputs(kind: str) -> dict:
     """
     ⚠️ STUB 제거: 실제 데이터만 수집
     🆕 Alpha Vantage로 주식 데이터 수집
+    - user_profile은 DEFAULT_PROFILE (일괄 생성 시 run_profile_analyses에서 교체)
     """
     import asyncio  # asyncio.sleep 사용을 위해 import
     
@@ -311,10 +613,7 @@ async def build_inputs(kind: str) -> dict:
         "daily_snapshot": {},  # FRED + Alpha Vantage에서 채움
         "macro": [],           # FRED/ECOS에서만 채움
         "headlines": headlines,
-        "user_profile": {
-            "risk_pref": "중립", 
-            "interests": ["반도체", "부동산"]
-        }
+        "user_profile": dict(DEFAULT_PROFILE)
     }
     
     # 🆕 Alpha Vantage 주식 지수 추가
@@ -336,25 +635,61 @@ async def call_llm(system_prompt: str, user_prompt: str) -> str:
             "분석 리포트를 생성하려면 OpenAI API가 필요합니다."
         )
     
-    try:
-        client = OpenAI(api_key=OPENAI)
-        resp = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3
-        )
-        return resp.choices[0].message.content
-    except Exception as e:
-        print(f"OpenAI API 오류: {e}")
-        return f"**오류**: OpenAI API 호출 실패 - {str(e)}\n\n(제공된 데이터를 기반으로 분석을 진행할 수 없습니다)"
+    # 포화 시 Overloaded 발생 → API에서 429로 변환
+    async with LLM_ADMISSION.slot():
+        try:
+            client = OpenAI(api_key=OPENAI)
+            # 동기 클라이언트 → 스레드에서 실행해 이벤트 루프를 막지 않음 (동시 호출 가능)
+            resp = await asyncio.to_thread(
+                client.chat.completions.create,
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3
+            )
+            return resp.choices[0].message.content
+        except Exception as e:
+            print(f"OpenAI API 오류: {e}")
+            return f"**오류**: OpenAI API 호출 실패 - {str(e)}\n\n(제공된 데이터를 기반으로 분석을 진행할 수 없습니다)"
+
+async def run_profile_analyses(data: dict, profiles: list[dict]) -> tuple[list[tuple[dict, str]], list[tuple[dict, Overloaded]]]:
+    """
+    🆕 한 번 수집한 입력 데이터로 여러 프로필의 해석 리포트를 동시에 생성
+    - 업스트림 수집은 호출 측에서 1회만 수행 (build_inputs)
+    - 일괄 요청 하나가 LLM 대기열을 채우지 않도록 LLM_CONCURRENCY개씩만 진입
+    - 일부 프로필이 LLM 수용 제어에 거절돼도 나머지 결과는 유지 (모든 작업이 끝난 뒤 반환)
+    - 반환: ([(profile, markdown), ...], [(profile, Overloaded), ...]) (profiles 순서 유지)
+    """
+    sem = asyncio.Semaphore(max(1, LLM_CONCURRENCY))
+
+    async def _one(profile: dict) -> str:
+        personalized = {**data, "user_profile": profile}
+        system, user = build_analysis_prompt(personalized)
+        async with sem:
+            return await call_llm(system, user)
+
+    outcomes = await asyncio.gather(*(_one(p) for p in profiles), return_exceptions=True)
+    done, refused = [], []
+    for profile, out in zip(profiles, outcomes):
+        if isinstance(out, Overloaded):
+            refused.append((profile, out))
+        elif isinstance(out, BaseException):
+            raise out
+        else:
+            done.append((profile, out))
+    return done, refused
 
 # ---------------- 해석 프롬프트 ----------------
 def build_analysis_prompt(data: dict) -> tuple[str, str]:
+    profile = data.get("user_profile") or DEFAULT_PROFILE
+    name = profile.get("name", DEFAULT_PROFILE["name"])
+    risk_pref = profile.get("risk_pref", DEFAULT_PROFILE["risk_pref"])
+    interests = ", ".join(profile.get("interests", [])) or "없음"
+
     system = (
-        "You are a Korean macro & markets analyst for one user (Junki). "
+        f"You are a Korean macro & markets analyst for one user ({name}). "
         "Style: concise, neutral, actionable. Explain terms briefly. "
         "Ground claims in provided data and links."
     )
@@ -385,7 +720,7 @@ def build_analysis_prompt(data: dict) -> tuple[str, str]:
 3) 거시 해석 (인플레/성장/고용/정책 각 2~3문장, RSS 뉴스와 연결).
 4) 시장 반응 & 관전 포인트 (RSS 뉴스에서 언급된 이슈 중심).
 5) 리스크 Top 3 (구체적 시나리오).
-6) 사용자 맞춤 코멘트 (관심 섹터: 반도체, 부동산. 과한 확신 금지).
+6) 사용자 맞춤 코멘트 (리스크 선호: {risk_pref}, 관심 섹터: {interests}. 과한 확신 금지).
 7) 참고 링크: 위 RSS 뉴스를 [1], [2], [3]... 형태로 본문에 인용.
 8) 마지막에 "### 📰 뉴스 출처" 섹션을 추가하여 모든 링크 나열.
 
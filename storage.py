@@ -1,6 +1,7 @@
 import sqlite3
 from pathlib import Path
 import json
+from typing import Iterator
 
 DB_PATH = Path(__file__).parent / "reports.db"
 
@@ -20,23 +21,68 @@ def init_db():
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_profiles (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              name TEXT NOT NULL,
+              risk_pref TEXT NOT NULL,    -- 보수 | 중립 | 공격
+              interests TEXT NOT NULL,    -- JSON 배열
+              created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS headlines (
+              id TEXT NOT NULL,           -- 정규화 URL(없으면 제목) sha1
+              topic TEXT NOT NULL,        -- all(공통 피드) | daily | weekly | monthly(kind별 검색 피드)
+              title TEXT NOT NULL,
+              url TEXT NOT NULL,
+              source TEXT NOT NULL,
+              published_at TEXT NOT NULL, -- ISO8601 UTC
+              fetched_at TEXT NOT NULL,
+              PRIMARY KEY (id, topic)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_headlines_topic_published ON headlines(topic, published_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ecos_observations (
+              stat_code TEXT NOT NULL,    -- 통계표 코드 (예: 722Y001)
+              item_code TEXT NOT NULL,    -- 항목 코드
+              cycle TEXT NOT NULL,        -- D | M | Q | A
+              time TEXT NOT NULL,         -- ECOS TIME (YYYYMMDD | YYYYMM | YYYYQn | YYYY)
+              value REAL NOT NULL,
+              fetched_at TEXT NOT NULL,
+              PRIMARY KEY (stat_code, item_code, cycle, time)
+            )
+            """
+        )
+        # 기존 DB 호환: reports.profile_id 컬럼이 없으면 추가
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(reports)").fetchall()]
+        if "profile_id" not in cols:
+            conn.execute("ALTER TABLE reports ADD COLUMN profile_id INTEGER")
 
-def save_report(kind: str, mode: str, date: str, title: str, markdown: str, sources: list, created_at: str) -> int:
+def save_report(kind: str, mode: str, date: str, title: str, markdown: str, sources: list, created_at: str, profile_id: int | None = None) -> int:
     with sqlite3.connect(DB_PATH) as conn:
         cur = conn.execute(
-            "INSERT INTO reports(kind, mode, date, title, markdown, sources, created_at) VALUES(?,?,?,?,?,?,?)",
-            (kind, mode, date, title, markdown, json.dumps(sources), created_at)
+            "INSERT INTO reports(kind, mode, date, title, markdown, sources, created_at, profile_id) VALUES(?,?,?,?,?,?,?,?)",
+            (kind, mode, date, title, markdown, json.dumps(sources), created_at, profile_id)
         )
         return cur.lastrowid
 
-def list_reports(kind: str | None = None, mode: str | None = None) -> list[dict]:
-    q = "SELECT id, kind, mode, date, title, markdown, sources, created_at FROM reports"
+def list_reports(kind: str | None = None, mode: str | None = None, profile_id: int | None = None) -> list[dict]:
+    q = "SELECT id, kind, mode, date, title, markdown, sources, created_at, profile_id FROM reports"
     params = []
     where = []
     if kind:
         where.append("kind=?"); params.append(kind)
     if mode:
         where.append("mode=?"); params.append(mode)
+    if profile_id is not None:
+        where.append("profile_id=?"); params.append(profile_id)
     if where:
         q += " WHERE " + " AND ".join(where)
     q += " ORDER BY date DESC, id DESC"
@@ -54,7 +100,134 @@ def list_reports(kind: str | None = None, mode: str | None = None) -> list[dict]
                 "markdown": r["markdown"],
                 "sources": json.loads(r["sources"]),
                 "created_at": r["created_at"],
+                "profile_id": r["profile_id"],
             })
         return out
 
+def iter_reports(
+    kind: str | None = None,
+    mode: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    chunk_size: int = 500,
+) -> Iterator[dict]:
+    """
+    reports 테이블을 id 기준 keyset 페이지네이션으로 chunk_size 행씩 읽어 한 건씩 yield
+    - 청크마다 짧은 연결로 읽고 바로 닫으므로 느린 다운로드가 쓰기 잠금을 막지 않음
+    - 전체 결과를 리스트로 만들지 않으므로 메모리 사용량이 아카이브 크기와 무관
+    - date_from/date_to: YYYY-MM-DD (양끝 포함)
+    """
+    q = "SELECT id, kind, mode, date, title, markdown, sources, created_at, profile_id FROM reports WHERE id>?"
+    params = []
+    if kind:
+        q += " AND kind=?"; params.append(kind)
+    if mode:
+        q += " AND mode=?"; params.append(mode)
+    if date_from:
+        q += " AND date>=?"; params.append(date_from)
+    if date_to:
+        q += " AND date<=?"; params.append(date_to)
+    q += " ORDER BY id LIMIT ?"
+    last_id = 0
+    while True:
+        with sqlite3.connect(DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(q, [last_id, *params, chunk_size]).fetchall()
+        conn.close()
+        for r in rows:
+            yield {
+                "id": r["id"],
+                "kind": r["kind"],
+                "mode": r["mode"],
+                "date": r["date"],
+                "title": r["title"],
+                "markdown": r["markdown"],
+                "sources": json.loads(r["sources"]),
+                "created_at": r["created_at"],
+                "profile_id": r["profile_id"],
+            }
+        if len(rows) < chunk_size:
+            break
+        last_id = rows[-1]["id"]
+
+def save_headlines(items: list[dict]) -> int:
+    """
+    헤드라인 일괄 저장 (같은 topic에 이미 있는 id는 무시)
+    - items: [{"id", "topic", "title", "url", "source", "published_at", "fetched_at"}, ...]
+    - 반환: 새로 추가된 건수
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO headlines(id, topic, title, url, source, published_at, fetched_at) VALUES(?,?,?,?,?,?,?)",
+            [(h["id"], h["topic"], h["title"], h["url"], h["source"], h["published_at"], h["fetched_at"]) for h in items]
+        )
+        return conn.total_changes - before
+
+def list_headlines(start: str, topics: list[str], end: str | None = None) -> list[dict]:
+    """
+    topics에 속하고 published_at이 [start, end] 구간인 헤드라인 전체 (최신순)
+    - 기간 전체를 읽어야 하므로 행 수 제한 없음 (topic, published_at 인덱스 사용)
+    """
+    marks = ",".join("?" * len(topics))
+    q = f"SELECT title, url, source, published_at FROM headlines WHERE topic IN ({marks}) AND published_at>=?"
+    params = [*topics, start]
+    if end:
+        q += " AND published_at<=?"; params.append(end)
+    q += " ORDER BY published_at DESC"
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(q, params).fetchall()
+        return [dict(r) for r in rows]
+
+def save_ecos_observations(rows: list[dict]) -> int:
+    """ECOS 관측치 저장 (같은 시점은 덮어씀, 잠정치 수정 반영)"""
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO ecos_observations(stat_code, item_code, cycle, time, value, fetched_at) VALUES(?,?,?,?,?,?)",
+            [(r["stat_code"], r["item_code"], r["cycle"], r["time"], r["value"], r["fetched_at"]) for r in rows]
+        )
+        return len(rows)
+
+def latest_ecos_observation(stat_code: str, item_code: str, cycle: str) -> dict | None:
+    """로컬에 저장된 가장 최근 관측치 (PK 인덱스로 조회)"""
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        r = conn.execute(
+            "SELECT time, value, fetched_at FROM ecos_observations "
+            "WHERE stat_code=? AND item_code=? AND cycle=? ORDER BY time DESC LIMIT 1",
+            (stat_code, item_code, cycle)
+        ).fetchone()
+        return dict(r) if r else None
+
+def save_profile(name: str, risk_pref: str, interests: list, created_at: str) -> int:
+    with sqlite3.connect(DB_PATH) as conn:
+        cur = conn.execute(
+            "INSERT INTO user_profiles(name, risk_pref, interests, created_at) VALUES(?,?,?,?)",
+            (name, risk_pref, json.dumps(interests, ensure_ascii=False), created_at)
+        )
+        return cur.lastrowid
+
+def list_profiles() -> list[dict]:
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT id, name, risk_pref, interests, created_at FROM user_profiles ORDER BY id"
+        ).fetchall()
+        return [
+            {
+                "id": r["id"],
+                "name": r["name"],
+                "risk_pref": r["risk_pref"],
+                "interests": json.loads(r["interests"]),
+                "created_at": r["created_at"],
+            }
+            for r in rows
+        ]
+
+def delete_profile(profile_id: int) -> bool:
+    with sqlite3.connect(DB_PATH) as conn:
+        cur = conn.execute("DELETE FROM user_profiles WHERE id=?", (profile_id,))
+        return cur.rowcount > 0
+
 init_db()